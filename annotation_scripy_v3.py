@@ -1,22 +1,82 @@
 import sys
 import os
 import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 import numpy as np
-import pandas as pd
 import scipy.io.wavfile as wav
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QLabel, QRadioButton,
-                             QButtonGroup, QComboBox, QTabWidget, QSizePolicy, QGroupBox, QMessageBox, QSlider)
-from PyQt5.QtCore import Qt, QTimer, QUrl
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
+                             QButtonGroup, QComboBox, QTabWidget, QSizePolicy, QGroupBox, QMessageBox, QSlider,
+                             QCheckBox, QScrollBar, QShortcut)
+from PyQt5.QtCore import Qt, QTimer, QUrl, QThread, pyqtSignal
+from PyQt5.QtGui import QKeySequence
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
-from stockwell import st
-import matplotlib.pyplot as plt
+from matplotlib import mlab
+from content_ids import scan_dataset, wav_duration
+from annotation_store import AnnotationStore, parse_marker, parse_drops
+from edit_history import EditHistory
+# stockwell and QtMultimedia are slow to import, so they are loaded on first use (S-Transform
+# view and audio playback respectively). check_startup.py keeps this honest.
 
 #ok shawty WAIT A MF MINUTE COUNTING ALL MY BANDS YEAH COUNTING ALL MY DIGITS WHEN YOU COME THRU BET YOULL KNOW 
 # ILL COME THRU ALL THE BITCHES WANT ME BUT YOU KNOW THAT I WANT YOU I 
 # AINT TRYNA WASTE YOUR TIME
 
+STREAM_WINDOW_SECONDS = 10  # length of one time-frequency window in streaming mode
+STREAM_AUTO_SECONDS = 120  # recordings longer than this open in streaming mode
+STREAM_MAX_PLOT_POINTS = 20000  # waveform samples drawn per window in Dual View
+IMAGE_CACHE_BYTES = 256 * 1024 ** 2  # spectrogram images kept so Back doesn't recompute them
+NEXT_TARGET_MS = 50  # rapid mode budget from pressing Next to the next image on screen
+MARKER_TOLERANCE = 0.02  # fraction of the visible time span within which a click picks a marker
+
+# Annotation fields backed by a radio button group: field -> button group attribute
+FORM_GROUPS = {
+    'quality': 'quality_group',
+    'systolic_murmur': 'systolic_murmur_group',
+    'diastolic_murmur': 'diastolic_murmur_group',
+    'continuous_murmur': 'continuous_murmur_group',
+    'quality_drop': 'drop_quality_group',
+}
+
+# Rapid mode key bindings: (key, annotation field, button label)
+RAPID_LABEL_KEYS = [
+    ('1', 'quality', 'Good'), ('2', 'quality', 'Bad'), ('3', 'quality', 'unsure'),
+    ('Q', 'systolic_murmur', 'yes'), ('W', 'systolic_murmur', 'no'), ('E', 'systolic_murmur', 'unsure'),
+    ('A', 'diastolic_murmur', 'yes'), ('S', 'diastolic_murmur', 'no'), ('D', 'diastolic_murmur', 'unsure'),
+    ('Z', 'continuous_murmur', 'yes'), ('X', 'continuous_murmur', 'no'), ('C', 'continuous_murmur', 'unsure'),
+]
+RAPID_CONFIDENCE_KEYS = ['7', '8', '9', '0']  # Perfect, High, Low, None
+
+def discover_wav_files(folder_path, completed_files, manifest_path=None):
+    # completed_files holds content IDs and, for rows saved before content IDs, filenames.
+    # Duplicates and corrupt files are dropped here so they never reach the annotator.
+    completed_files = set(completed_files)
+    file_list = []
+    content_ids = {}
+    for record in scan_dataset(folder_path, manifest_path):
+        if record['status'] == 'duplicate':
+            print(f"Skipping {record['filename']}: same recording as {record['duplicate_of']}")
+        elif record['status'] == 'corrupt':
+            print(f"Skipping {record['filename']}: {record['error']}")
+        elif record['content_id'] not in completed_files and record['filename'] not in completed_files:
+            file_list.append(record['filename'])
+            content_ids[record['filename']] = record['content_id']
+    return file_list, content_ids
+
+class FileDiscoveryThread(QThread):
+    # Walks and hashes the data folder off the UI thread so the window can appear right away
+    files_found = pyqtSignal(list, dict)
+
+    def __init__(self, folder_path, completed_files, manifest_path=None, parent=None):
+        super().__init__(parent)
+        self.folder_path = folder_path
+        self.completed_files = completed_files
+        self.manifest_path = manifest_path
+
+    def run(self):
+        self.files_found.emit(*discover_wav_files(self.folder_path, self.completed_files, self.manifest_path))
+
 class AnnotationApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -32,7 +92,31 @@ class AnnotationApp(QMainWindow):
         self.marking_type = None  #handle marking type selection
         self.s_transform_used = False  # To track if S-transform was used
         self.file_list = []  
-        self.mediaPlayer = QMediaPlayer(None, QMediaPlayer.LowLatency) 
+        self.content_ids = {}  # filename -> content ID, so annotations survive renames
+        self.completed_files = []
+        self.discovery_thread = None
+        self.mediaPlayer = None  # created by init_media_player once the window is up
+        self.stream_source = None  # (filepath, rate, memory-mapped samples) for streaming mode
+        self.streaming_choice = None  # set once the user toggles streaming; otherwise decided by file length
+        self.stream_cache = OrderedDict()  # sliding cache of rendered windows (or pending Futures) around the current one
+        self.stream_executor = None  # background worker computing neighbouring stream windows
+        self.stream_extent = None  # (start, end) in seconds of the stream window on screen
+        self.prefetch_executor = None  # background worker computing the next file's image in rapid mode
+        self.prefetched = {}  # (filepath, view, amplify_factor) -> Future of (image, extent)
+        self.image_cache = OrderedDict()  # (filepath, view, amplify_factor) -> (image, extent) of recent files
+        self.file_image = None  # AxesImage reused from file to file; None when the axes hold something else
+        self.file_image_view = None
+        self.file_image_key = None  # (filepath, view, amplify_factor) of the image on the axes
+        self.store = None  # AnnotationStore, opened by get_completed_files
+        self.histories = {}  # content ID (or filename) -> EditHistory for that file
+        self.form_state = {}  # last known value of each form field, so label edits know what they replaced
+        self.selected_marker = None  # (field, drop position or None) picked with shift+click, placed by the next click
+        self.rapid_shortcuts = []
+        self.session_start = time.time()
+        self.next_pressed_at = None
+        self.next_latencies = []  # ms from Next to the image being drawn, this session
+        self.throughput_message = ''
+        self.last_audio_position = None
         self.amplify_factor = 1.0  #1.0 = 100%
         self.init_ui()
 
@@ -84,6 +168,14 @@ class AnnotationApp(QMainWindow):
 
         self.toolbar = NavigationToolbar(self.canvas, self)
         layout.addWidget(self.canvas)
+
+        # Scrolls through the recording one window at a time in streaming mode
+        self.window_scroll = QScrollBar(Qt.Horizontal)
+        self.window_scroll.setRange(0, 0)
+        self.window_scroll.setPageStep(1)
+        self.window_scroll.valueChanged.connect(self.render_view)
+        self.window_scroll.hide()
+        layout.addWidget(self.window_scroll)
         layout.addWidget(self.toolbar)
 
         self.tabs = QTabWidget()
@@ -102,6 +194,10 @@ class AnnotationApp(QMainWindow):
         annotation_layout.addWidget(QLabel("View Type:"))
         annotation_layout.addWidget(self.view_type)
 
+        self.streaming_checkbox = QCheckBox(f"Streaming mode ({STREAM_WINDOW_SECONDS}s windows)")
+        self.streaming_checkbox.toggled.connect(self.toggle_streaming)
+        annotation_layout.addWidget(self.streaming_checkbox)
+
         self.quality_group = QButtonGroup(self)
         self.quality_unsure = QRadioButton("unsure")
         self.quality_good = QRadioButton("Good")
@@ -204,8 +300,139 @@ class AnnotationApp(QMainWindow):
         marking_type_box.setLayout(marking_type_layout)
         annotation_layout.addWidget(marking_type_box)
 
+        self.rapid_checkbox = QCheckBox("Rapid mode (keyboard: 1-3 quality, QWE/ASD/ZXC systolic/diastolic/continuous, "
+                                        "7-0 confidence, Enter next, Shift+Enter skip, Backspace back)")
+        self.rapid_checkbox.toggled.connect(self.toggle_rapid_mode)
+        annotation_layout.addWidget(self.rapid_checkbox)
+        self.create_rapid_shortcuts()
+
+        for field, group in FORM_GROUPS.items():
+            getattr(self, group).buttonClicked.connect(lambda button, field=field: self.on_label_edit(field, button.text()))
+        self.confidence_dropdown.activated.connect(
+            lambda index: self.on_label_edit('confidence', self.confidence_dropdown.itemText(index)))
+        self.sync_form_state()
+
         self.tabs.addTab(annotation_tab, "Annotations")
 
+    def create_rapid_shortcuts(self):
+        def bind(key, action):
+            shortcut = QShortcut(QKeySequence(key), self)
+            shortcut.setContext(Qt.ApplicationShortcut)
+            shortcut.activated.connect(action)
+            shortcut.setEnabled(False)
+            self.rapid_shortcuts.append(shortcut)
+
+        for key, field, label in RAPID_LABEL_KEYS:
+            bind(key, lambda field=field, label=label: self.edit_field(field, label))
+        for index, key in enumerate(RAPID_CONFIDENCE_KEYS):
+            bind(key, lambda index=index: self.edit_field('confidence', self.confidence_dropdown.itemText(index)))
+        bind(Qt.Key_Return, lambda: self.save_annotations(skip=False))
+        bind(Qt.Key_Enter, lambda: self.save_annotations(skip=False))
+        bind(Qt.SHIFT + Qt.Key_Return, lambda: self.save_annotations(skip=True))
+        bind(Qt.Key_Backspace, self.go_back)
+
+    def check_label(self, group, label):
+        for button in getattr(self, group).buttons():
+            if button.text() == label:
+                button.setChecked(True)
+
+    def sync_form_state(self):
+        for field, group in FORM_GROUPS.items():
+            button = getattr(self, group).checkedButton()
+            self.form_state[field] = button.text() if button else None
+        self.form_state['confidence'] = self.confidence_dropdown.currentText()
+
+    def history_key(self):
+        return self.content_ids.get(self.current_file) or self.current_file
+
+    def current_history(self):
+        return self.histories.setdefault(self.history_key(), EditHistory())
+
+    def field_value(self, field):
+        if field in self.line_positions:
+            return self.line_positions[field]
+        if field == 'quality_drop_positions':
+            return [list(pair) for pair in self.quality_drop_positions]
+        return self.form_state.get(field)
+
+    def set_field(self, field, value):
+        # Applies a value without recording it; edit_field, undo and redo all go through here
+        if field in self.line_positions:
+            self.line_positions[field] = value
+        elif field == 'quality_drop_positions':
+            self.quality_drop_positions = [list(pair) for pair in value]
+        elif field == 'confidence':
+            self.confidence_dropdown.setCurrentText(value)
+            self.form_state[field] = value
+        else:
+            self.check_label(FORM_GROUPS[field], value)
+            self.form_state[field] = value
+
+    def edit_field(self, field, value):
+        if self.current_file is None:
+            return
+        if self.current_history().record(field, self.field_value(field), value):
+            self.apply_field(field, value)
+
+    def on_label_edit(self, field, value):
+        # The widget has already changed, so only the history needs the edit
+        if self.current_file is not None:
+            self.current_history().record(field, self.form_state.get(field), value)
+        self.form_state[field] = value
+
+    def apply_field(self, field, value):
+        self.apply_fields([(field, value)])
+
+    def apply_fields(self, edits):
+        for field, value in edits:
+            self.set_field(field, value)
+        # One marker redraw however many fields changed
+        if any(field in self.line_positions or field == 'quality_drop_positions' for field, _ in edits):
+            self.redraw_markers()
+
+    def undo(self):
+        if self.current_file is None:
+            return
+        edits = self.current_history().undo()
+        if edits:
+            self.apply_fields(edits)
+
+    def redo(self):
+        if self.current_file is None:
+            return
+        edits = self.current_history().redo()
+        if edits:
+            self.apply_fields(edits)
+
+    def reset_with_history(self):
+        # The Reset button: every field it clears goes into the history as a single command,
+        # so one undo brings the whole annotation back
+        fields = list(self.line_positions) + ['quality_drop_positions'] + list(FORM_GROUPS) + ['confidence']
+        before = {field: self.field_value(field) for field in fields}
+        self.reset_annotations()
+        if self.current_file is not None:
+            self.current_history().record_many([(field, before[field], self.field_value(field)) for field in fields])
+
+    def redraw_markers(self):
+        # Only the marker overlay changes; the image underneath stays as it is
+        for line in self.lines:
+            line.remove()
+        for label in self.line_labels:
+            label.remove()
+        self.restore_lines(self.ax)
+        self.last_audio_position = None
+        self.canvas.draw_idle()
+
+    def toggle_rapid_mode(self, checked):
+        for shortcut in self.rapid_shortcuts:
+            shortcut.setEnabled(checked)
+        if checked:
+            # Keep key presses away from the combo boxes so the shortcuts always fire
+            self.setFocus()
+            self.prefetch_next_file()
+        else:
+            self.prefetched.clear()
+
     def create_controls_tab(self):
         controls_tab = QWidget()
         controls_layout = QVBoxLayout(controls_tab)
@@ -228,9 +455,32 @@ class AnnotationApp(QMainWindow):
         buttons_layout.addWidget(self.exit_button)
 
         self.reset_button = QPushButton("Reset")
-        self.reset_button.clicked.connect(self.reset_annotations)
+        self.reset_button.clicked.connect(lambda: self.reset_with_history())  # clicked passes checked=False
         buttons_layout.addWidget(self.reset_button)
 
+        self.undo_button = QPushButton("Undo")
+        self.undo_button.clicked.connect(self.undo)
+        buttons_layout.addWidget(self.undo_button)
+
+        # Nothing to save or go back to until discovery has loaded the first file
+        for button in (self.next_button, self.back_button, self.skip_button, self.exit_button):
+            button.setEnabled(False)
+
+        self.redo_button = QPushButton("Redo")
+        self.redo_button.clicked.connect(self.redo)
+        buttons_layout.addWidget(self.redo_button)
+
+        # Each sequence is bound once; two shortcuts on the same keys only fire activatedAmbiguously
+        redo_keys = QKeySequence.keyBindings(QKeySequence.Redo) + [QKeySequence('Ctrl+Shift+Z')]
+        bindings = [(key, self.undo) for key in QKeySequence.keyBindings(QKeySequence.Undo)]
+        bindings += [(key, self.redo) for key in redo_keys]
+        bound = set()
+        for key, action in bindings:
+            if key.isEmpty() or key.toString() in bound:
+                continue
+            bound.add(key.toString())
+            QShortcut(key, self).activated.connect(action)
+
         controls_layout.addLayout(buttons_layout)
 
         audio_layout = QHBoxLayout()
@@ -263,8 +513,16 @@ class AnnotationApp(QMainWindow):
         volume_layout.addWidget(self.volume_value_label)
         controls_layout.addLayout(volume_layout)
 
+        self.tabs.addTab(controls_tab, "Controls")
+
+    def init_media_player(self):
+        if self.mediaPlayer is not None:
+            return
+        from PyQt5.QtMultimedia import QMediaPlayer
+        self.mediaPlayer = QMediaPlayer(None, QMediaPlayer.LowLatency)
         self.mediaPlayer.durationChanged.connect(self.update_duration)
         self.mediaPlayer.positionChanged.connect(self.update_position)
+        self.update_volume()
 
         self.timer = QTimer(self)
         self.timer.setInterval(5)  
@@ -272,8 +530,6 @@ class AnnotationApp(QMainWindow):
         self.timer.timeout.connect(self.update_slider)
         self.timer.start()
 
-        self.tabs.addTab(controls_tab, "Controls")
-
     def confirm_update_view(self):
         view = self.view_type.currentText()
         if view == "S-Transform":
@@ -292,47 +548,206 @@ class AnnotationApp(QMainWindow):
 
     def update_view(self):
         self.start_time = time.time()
+        self.render_view()
+
+    def render_view(self):
+        if self.current_file is None:
+            return
+        self.last_audio_position = None  # the audio line is redrawn with the markers, so let the timer put it back
         view = self.view_type.currentText()
-        if view == "Spectrogram":
-            self.show_spectrogram(self.ax, self.current_file)
-        elif view == "S-Transform":
-            self.show_s_transform(self.ax, self.current_file)
+        if self.streaming_checkbox.isChecked():
+            self.file_image = None
+            self.show_stream_window(self.ax, self.current_file, view)
         elif view == "Dual View":
+            self.file_image = None
             self.show_dual_view(self.ax, self.current_file)
+        else:
+            self.show_file_view(self.ax, self.current_file, view)
         self.canvas.draw()
-
-    def show_spectrogram(self, ax, filepath):
+        if self.next_pressed_at is not None:
+            self.log_next_latency((time.perf_counter() - self.next_pressed_at) * 1000)
+            self.next_pressed_at = None
+        self.prefetch_next_file()
+
+    def log_next_latency(self, latency):
+        self.next_latencies.append(latency)
+        over = sum(ms > NEXT_TARGET_MS for ms in self.next_latencies)
+        message = (f"Next -> image in {latency:.0f} ms (target {NEXT_TARGET_MS} ms, "
+                   f"{over} of {len(self.next_latencies)} over)")
+        if latency > NEXT_TARGET_MS:
+            print(message)
+        self.statusBar().showMessage(f"{self.throughput_message} | {message}" if self.throughput_message else message)
+
+    def prepare_streaming(self, filepath):
+        # Streaming follows the user's own toggle if they have made one, otherwise the file length
+        # (read from the header, so short files are never opened twice)
+        streaming = self.streaming_choice
+        if streaming is None:
+            duration = wav_duration(filepath)
+            streaming = duration is not None and duration > STREAM_AUTO_SECONDS
+        self.streaming_checkbox.blockSignals(True)
+        self.streaming_checkbox.setChecked(streaming)
+        self.streaming_checkbox.blockSignals(False)
+        self.window_scroll.setVisible(streaming)
+        self.stream_source = None
+        self.clear_stream_cache()
+        if streaming:
+            self.open_stream_source(filepath)
+
+    def open_stream_source(self, filepath):
+        # Memory-mapped, so only the samples of the windows actually viewed are paged in.
+        # Some formats (e.g. 24-bit PCM) can't be mapped and are read normally instead.
+        try:
+            rate, data = wav.read(filepath, mmap=True)
+        except ValueError:
+            rate, data = wav.read(filepath)
+        self.stream_source = (filepath, rate, data)
+        self.clear_stream_cache()
+        n_windows = max(1, int(np.ceil(len(data) / (rate * STREAM_WINDOW_SECONDS))))
+        self.window_scroll.blockSignals(True)
+        self.window_scroll.setRange(0, n_windows - 1)
+        self.window_scroll.setValue(0)
+        self.window_scroll.blockSignals(False)
+
+    def toggle_streaming(self, checked):
+        self.streaming_choice = checked
+        self.window_scroll.setVisible(checked)
+        self.render_view()
+
+    def clear_stream_cache(self):
+        for entry in self.stream_cache.values():
+            if isinstance(entry, Future):
+                entry.cancel()
+        self.stream_cache.clear()
+        self.stream_extent = None
+
+    def read_stream_window(self, source, index, amplify_factor):
+        # Everything comes in as arguments so this can run on the prefetch worker
+        _, rate, data = source
+        start = index * rate * STREAM_WINDOW_SECONDS
+        chunk = self.amplify_signal(np.array(data[start:start + rate * STREAM_WINDOW_SECONDS]), amplify_factor)
+        if chunk.ndim > 1:
+            chunk = np.mean(chunk, axis=1)
+        return rate, start / rate, chunk
+
+    def compute_stream_window(self, source, view, index, amplify_factor):
+        rate, t0, chunk = self.read_stream_window(source, index, amplify_factor)
+        return self.compute_view_image(view, rate, t0, chunk)
+
+    def compute_view_image(self, view, rate, t0, chunk, downsample_factor=10):
+        if view == "Spectrogram":
+            Pxx, freqs, bins = mlab.specgram(chunk, Fs=rate, NFFT=1024, noverlap=900)
+            Pxx[Pxx == 0] = np.finfo(float).eps  # Prevent log(0) issues
+            return 10 * np.log10(Pxx), [t0, t0 + bins[-1], freqs[0], freqs[-1]]
+        if view == "S-Transform":
+            from stockwell import st
+            chunk = chunk[::downsample_factor]
+            rate = rate // downsample_factor
+            return np.abs(st.st(chunk)), [t0, t0 + len(chunk) / rate, 0, rate / 2]
+        # Min/max of each block rather than every step-th sample, so peaks survive the thinning
+        step = max(1, 2 * len(chunk) // STREAM_MAX_PLOT_POINTS)
+        if step == 1:
+            return chunk, [t0, t0 + len(chunk) / rate, 1 / rate, None]
+        blocks = chunk[:len(chunk) // step * step].reshape(-1, step)
+        envelope = np.column_stack([blocks.min(axis=1), blocks.max(axis=1)]).ravel()
+        return envelope, [t0, t0 + len(chunk) / rate, step / 2 / rate, None]
+
+    def get_stream_window(self, view, index):
+        key = (view, index, self.amplify_factor)
+        if key not in self.stream_cache:
+            self.stream_cache[key] = self.compute_stream_window(self.stream_source, view, index, self.amplify_factor)
+        elif isinstance(self.stream_cache[key], Future):
+            # Prefetched in the background; only waits if the user scrolled faster than it ran
+            self.stream_cache[key] = self.stream_cache[key].result()
+        self.stream_cache.move_to_end(key)
+        # Keep only the current window and its neighbours so memory stays flat
+        for cached in list(self.stream_cache):
+            if cached[0] != view or cached[2] != self.amplify_factor or abs(cached[1] - index) > 1:
+                if isinstance(self.stream_cache[cached], Future):
+                    self.stream_cache[cached].cancel()
+                del self.stream_cache[cached]
+        return self.stream_cache[key]
+
+    def prefetch_stream_windows(self, view, index):
+        # Neighbours are computed on a worker so scrolling never waits on them; the Futures sit in
+        # stream_cache and get_stream_window swaps in the result when that window is shown
+        if self.stream_source is None:
+            return
+        if self.stream_executor is None:
+            self.stream_executor = ThreadPoolExecutor(max_workers=1)
+        for neighbour in (index + 1, index - 1):
+            key = (view, neighbour, self.amplify_factor)
+            if 0 <= neighbour <= self.window_scroll.maximum() and key not in self.stream_cache:
+                self.stream_cache[key] = self.stream_executor.submit(
+                    self.compute_stream_window, self.stream_source, view, neighbour, self.amplify_factor)
+
+    def show_stream_window(self, ax, filepath, view):
         ax.clear()
-        rate, data = wav.read(filepath)
-        if data.ndim > 1:  
-            data = np.mean(data, axis=1)
-        data = self.amplify_signal(data)  
-        Pxx, freqs, bins, im = ax.specgram(data, Fs=rate, NFFT=1024, noverlap=900, cmap='jet')
-        Pxx[Pxx == 0] = np.finfo(float).eps  # Prevent log(0) issues
-        ax.imshow(10 * np.log10(Pxx), extent=[0, bins[-1], freqs[0], freqs[-1]], aspect='auto', cmap='jet', origin='lower')
-        ax.set_title(os.path.basename(filepath), pad=30)
-        ax.set_xlabel('Time (s)')
-        ax.set_ylabel('Frequency (Hz)')
+        if self.stream_source is None or self.stream_source[0] != filepath:
+            self.open_stream_source(filepath)
+        index = self.window_scroll.value()
+        image, extent = self.get_stream_window(view, index)
+        # Extents are in absolute time, so markers stay where they were placed whichever window is shown
+        self.stream_extent = (extent[0], extent[1])
+        self.draw_view_image(ax, view, image, extent)
+        ax.set_title(f'{view}: {os.path.basename(filepath)} [{extent[0]:.0f}s - {extent[1]:.0f}s]', pad=30)
         self.restore_lines(ax)
+        self.prefetch_stream_windows(view, index)
 
-    def show_s_transform(self, ax, filepath, max_length=False, downsample_factor=10):
-        ax.clear()
+    def draw_view_image(self, ax, view, image, extent):
+        if view == "Dual View":
+            ax.plot(extent[0] + np.arange(len(image)) * extent[2], image)
+            ax.set_ylabel('Amplitude')
+        else:
+            ax.imshow(image, extent=extent, aspect='auto', cmap='jet', origin='lower')
+            ax.set_ylabel('Frequency (Hz)')
+            if view == "S-Transform":
+                ax.set_yscale('log')
+                ax.set_ylim([10, extent[3]])
+        ax.set_xlim(extent[0], extent[1])
+        ax.set_xlabel('Time (s)')
+
+    def compute_file_image(self, view, filepath, amplify_factor):
         rate, data = wav.read(filepath)
-        if data.ndim > 1:  
+        data = self.amplify_signal(data, amplify_factor)
+        if data.ndim > 1:
             data = np.mean(data, axis=1)
-        data = data[::downsample_factor]
-        rate = rate // downsample_factor
-        if max_length:
-            data = data[:rate * max_length]
-        data = self.amplify_signal(data)  
-        S = st.st(data)
-        ax.imshow(np.abs(S), aspect='auto', extent=[0, len(data)/rate, 0, rate/2], cmap='jet', origin='lower')
-        ax.set_title(f'S-Transform: {os.path.basename(filepath)}', pad=30)
-        ax.set_xlabel('Time (s)')
-        ax.set_ylabel('Frequency (Hz)')
-        ax.set_yscale('log')
-        ax.set_ylim([10, rate / 2])
-        self.restore_lines(ax)
+        return self.compute_view_image(view, rate, 0, data)
+
+    def prefetch_next_file(self):
+        # Computes the next file's image in the background so Next only has to draw it
+        if (not self.rapid_checkbox.isChecked() or self.streaming_checkbox.isChecked()
+                or self.current_index >= len(self.file_list) - 1):
+            return
+        if self.prefetch_executor is None:
+            self.prefetch_executor = ThreadPoolExecutor(max_workers=1)
+        view = self.view_type.currentText()
+        if view != "Spectrogram":
+            # S-Transform images are O(N^2) and Dual View plots the raw samples, so neither is held ahead
+            return
+        next_file = self.file_list[self.current_index + 1]
+        key = (next_file, view, self.amplify_factor)
+        self.prefetched = {cached: future for cached, future in self.prefetched.items() if cached == key}
+        if key not in self.prefetched and key not in self.image_cache:
+            self.prefetched[key] = self.prefetch_executor.submit(self.compute_file_image, view, next_file, self.amplify_factor)
+
+    def get_file_image(self, view, filepath):
+        key = (filepath, view, self.amplify_factor)
+        if key in self.image_cache:
+            self.image_cache.move_to_end(key)
+            return self.image_cache[key]
+        future = self.prefetched.pop(key, None)
+        result = future.result() if future is not None else self.compute_file_image(view, filepath, self.amplify_factor)
+        self.image_cache[key] = result
+        # Spectrograms are capped by size. An S-Transform image can run to gigabytes, so only the
+        # current and previous file's are kept: enough for Back without recomputing
+        transforms = [cached for cached in self.image_cache if cached[1] == "S-Transform"]
+        for cached in transforms[:-2]:
+            del self.image_cache[cached]
+        spectrograms = [cached for cached in self.image_cache if cached[1] != "S-Transform"]
+        while len(spectrograms) > 1 and sum(self.image_cache[cached][0].nbytes for cached in spectrograms) > IMAGE_CACHE_BYTES:
+            del self.image_cache[spectrograms.pop(0)]
+        return result
 
     def show_dual_view(self, ax, filepath):
         ax.clear()
@@ -345,11 +760,39 @@ class AnnotationApp(QMainWindow):
         ax.set_ylabel('Amplitude')
         self.restore_lines(ax)
 
+    def show_file_view(self, ax, filepath, view):
+        image, extent = self.get_file_image(view, filepath)
+        if self.file_image is not None and self.file_image_view == view:
+            # Same kind of image already on the axes: swap its pixels and redraw only the markers,
+            # instead of clearing the axes and building every artist again
+            for artist in self.lines + self.line_labels:
+                artist.remove()
+            if self.file_image_key != (filepath, view, self.amplify_factor):
+                self.file_image.set_data(image)
+                self.file_image.set_extent(extent)
+                self.file_image.autoscale()
+                ax.set_xlim(extent[0], extent[1])
+                ax.set_ylim([10, extent[3]] if view == "S-Transform" else [extent[2], extent[3]])
+                self.toolbar.update()  # zoom history belongs to the previous file
+        else:
+            ax.clear()
+            self.draw_view_image(ax, view, image, extent)
+            self.file_image = ax.images[-1]
+            self.file_image_view = view
+        self.file_image_key = (filepath, view, self.amplify_factor)
+        ax.set_title(f'{view}: {os.path.basename(filepath)}', pad=30)
+        self.restore_lines(ax)
+
     def restore_lines(self, ax):
         self.lines = []
         self.line_labels = []
+        # Labels sit above the axes and aren't clipped, so in streaming mode markers outside the
+        # window on screen are skipped rather than drawn over the margins. Zooming doesn't filter.
+        xmin, xmax = -np.inf, np.inf
+        if self.streaming_checkbox.isChecked() and self.stream_extent is not None:
+            xmin, xmax = self.stream_extent
         for key, time in self.line_positions.items():
-            if time is not None:
+            if time is not None and xmin <= time <= xmax:
                 if 'S1_start' in key:
                     line = ax.axvline(time, color='red', label='S1 Start') 
                     label = 'S1 Start'
@@ -366,13 +809,13 @@ class AnnotationApp(QMainWindow):
                 line_label = self.ax.text(time, ax.get_ylim()[1], label, color=line.get_color(), verticalalignment='bottom')
                 self.line_labels.append(line_label)
         for start, end in self.quality_drop_positions:
-            if start is not None:
+            if start is not None and xmin <= start <= xmax:
                 line = ax.axvline(start, color='orange', linestyle='--', label='Quality Drop Start')
                 label = 'Quality Drop Start'
                 self.lines.append(line)
                 line_label = self.ax.text(start, self.ax.get_ylim()[1], label, color=line.get_color(), verticalalignment='bottom')
                 self.line_labels.append(line_label)
-            if end is not None:
+            if end is not None and xmin <= end <= xmax:
                 line = ax.axvline(end, color='brown', linestyle='--', label='Quality Drop End')
                 label = 'Quality Drop End'
                 self.lines.append(line)
@@ -383,19 +826,24 @@ class AnnotationApp(QMainWindow):
         volume = self.volume_slider.value()
         self.volume_value_label.setText(str(volume))
         if volume <= 100:
-            self.mediaPlayer.setVolume(volume)
             self.amplify_factor = 1.0
         else:
-            self.mediaPlayer.setVolume(100)
             self.amplify_factor = volume / 100.0
-
-    def amplify_signal(self, data):
-        if self.amplify_factor > 1.0:
+        if self.mediaPlayer is not None:
+            self.mediaPlayer.setVolume(min(volume, 100))
+
+    def amplify_signal(self, data, amplify_factor=None):
+        # Background jobs pass the factor they were queued with, in case the volume moves meanwhile
+        if amplify_factor is None:
+            amplify_factor = self.amplify_factor
+        if amplify_factor > 1.0:
             max_val = np.iinfo(data.dtype).max
-            data = np.clip(data * self.amplify_factor, -max_val, max_val).astype(data.dtype)
+            data = np.clip(data * amplify_factor, -max_val, max_val).astype(data.dtype)
         return data
 
     def save_annotations(self, skip=False, exit=False):
+        if self.current_file is None:
+            return  # discovery hasn't finished; rapid-mode Enter can still get here
         end_time = time.time()
         if self.start_time is None:
             self.start_time = end_time
@@ -403,6 +851,7 @@ class AnnotationApp(QMainWindow):
 
         annotation = {
             'filename': self.current_file,
+            'content_id': self.content_ids.get(self.current_file),
             'quality': self.quality_group.checkedButton().text() if self.quality_group.checkedButton() else 'skipped',
             'systolic_murmur': self.systolic_murmur_group.checkedButton().text() if self.systolic_murmur_group.checkedButton() else 'skipped',
             'diastolic_murmur': self.diastolic_murmur_group.checkedButton().text() if self.diastolic_murmur_group.checkedButton() else 'skipped',
@@ -410,21 +859,36 @@ class AnnotationApp(QMainWindow):
             'confidence': self.confidence_dropdown.currentText() if not skip else 'skipped',
             'quality_drop': self.drop_quality_group.checkedButton().text() if self.drop_quality_group.checkedButton() else 'skipped',
             'time_spent': time_spent,
-            's_transform_used': self.s_transform_used  # 
+            's_transform_used': self.s_transform_used,  # 
+            'rapid_mode': self.rapid_checkbox.isChecked()
         }
         annotation.update(self.line_positions)
         # Save quality drop positions as a list of tuples
-        annotation['quality_drop_positions'] = self.quality_drop_positions
+        annotation['quality_drop_positions'] = [list(pair) for pair in self.quality_drop_positions]
         self.annotations.append(annotation)
+        if self.store is not None:
+            self.store.put(annotation)  # written to disk now, not at exit
+        self.log_throughput()
 
         if not exit:
-            self.reset_annotations()
+            self.next_pressed_at = time.perf_counter()
             self.load_next_file()
         else:
             self.exit_flag = True
             self.close()
 
-    def reset_annotations(self):
+    def log_throughput(self):
+        hours = (time.time() - self.session_start) / 3600
+        rate = len(self.annotations) / hours if hours > 0 else 0
+        mode = "rapid" if self.rapid_checkbox.isChecked() else "standard"
+        message = f"{len(self.annotations)} annotations this session, {rate:.0f}/hour ({mode} mode)"
+        print(message)
+        self.throughput_message = message
+        self.statusBar().showMessage(message)
+
+    def reset_annotations(self, redraw=True):
+        # Only touch the canvas when there were markers to take off it
+        had_markers = any(time is not None for time in self.line_positions.values()) or bool(self.quality_drop_positions)
         self.quality_unsure.setChecked(True)
         self.systolic_murmur_unsure.setChecked(True)
         self.diastolic_murmur_unsure.setChecked(True)
@@ -438,57 +902,107 @@ class AnnotationApp(QMainWindow):
         self.mark_quality.setChecked(False)
         self.marking_type_group.setExclusive(True)
         self.s_transform_used = False  # Reset S-transform 
+        # The audio position line stays; it isn't a marker and the timer keeps it current
         for line in self.lines:
-            line.remove()
+            if line.get_linestyle() != '-.':
+                line.remove()
         for label in self.line_labels:
             label.remove()
-        self.lines.clear()
+        self.lines = [line for line in self.lines if line.get_linestyle() == '-.']
         self.line_labels.clear()
-        self.canvas.draw()
+        self.sync_form_state()
+        if redraw and had_markers:
+            self.canvas.draw_idle()
+
+    def load_file(self, index):
+        self.selected_marker = None
+        self.current_index = index
+        self.current_file = self.file_list[self.current_index]
+        self.set_audio_file(self.current_file)  # Load audio file for this annotation
+        self.prepare_streaming(self.current_file)
+        self.restore_annotation()
+        self.update_view()
 
     def load_next_file(self):
         if self.current_index < len(self.file_list) - 1:
-            self.current_index += 1
-            self.current_file = self.file_list[self.current_index]
-            self.set_audio_file(self.current_file)  # Load audio file for next annotation
-            self.update_view()
+            self.load_file(self.current_index + 1)
         else:
             self.close()
 
     def load_previous_file(self):
         if self.current_index > 0:
-            self.current_index -= 1
-            self.current_file = self.file_list[self.current_index]
-            self.set_audio_file(self.current_file)  # Load audio file for prev annotation
-            self.update_view()
+            self.load_file(self.current_index - 1)
+
+    def restore_annotation(self):
+        # Fills the form and markers from the saved annotation for this file, if there is one;
+        # the markers are drawn by restore_lines when the view renders
+        self.reset_annotations(redraw=False)
+        saved = self.store.get(self.content_ids.get(self.current_file), self.current_file) if self.store else None
+        if saved is None:
+            return
+        for key in self.line_positions:
+            self.line_positions[key] = parse_marker(saved.get(key))
+        self.quality_drop_positions = parse_drops(saved.get('quality_drop_positions'))
+        for field in list(FORM_GROUPS) + ['confidence']:
+            if saved.get(field) not in (None, '', 'skipped'):
+                self.set_field(field, saved[field])
+        self.s_transform_used = saved.get('s_transform_used') in (True, 'True')
 
     def get_completed_files(self, csv_path):
-        if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-            return df['filename'].tolist()
-        return []
-
-    def get_last_index(self, csv_path):
-        if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-            if not df.empty:
-                last_file = df['filename'].iloc[-1]
-                if last_file in self.file_list:
-                    return self.file_list.index(last_file)
+        # Content IDs where the row has one, filenames for rows saved before content IDs existed
+        self.store = AnnotationStore(csv_path)
+        self.completed_files = self.store.keys()
+        return self.completed_files
+
+    def get_last_index(self, completed_files):
+        if completed_files:
+            last_file = completed_files[-1]
+            for index, filename in enumerate(self.file_list):
+                if last_file in (filename, self.content_ids.get(filename)):
+                    return index
         return -1
 
-    def get_file_list(self, folder_path, completed_files):
-        self.file_list = []
-        for subdir, _, files in os.walk(folder_path):
-            for file in files:
-                if file.endswith('.wav'):
-                    full_path = os.path.join(subdir, file)
-                    if full_path not in completed_files:
-                        self.file_list.append(full_path)
+    def get_file_list(self, folder_path, completed_files, manifest_path=None):
+        self.file_list, self.content_ids = discover_wav_files(folder_path, completed_files, manifest_path)
         return self.file_list
 
+    def start_file_discovery(self, folder_path, completed_files, manifest_path=None):
+        self.discovery_thread = FileDiscoveryThread(folder_path, completed_files, manifest_path, self)
+        self.discovery_thread.files_found.connect(self.on_files_discovered)
+        self.discovery_thread.start()
+
+    def on_files_discovered(self, file_list, content_ids):
+        self.file_list = file_list
+        self.content_ids = content_ids
+        if not self.file_list:
+            print("All files have been annotated.")
+            self.close()
+            return
+        last_index = self.get_last_index(self.completed_files)
+        if last_index != -1:
+            self.current_index = last_index
+            self.current_file = self.file_list[self.current_index]
+        self.init_media_player()
+        for button in (self.next_button, self.back_button, self.skip_button, self.exit_button):
+            button.setEnabled(True)
+        self.load_next_file()
+
     def on_click(self, event):
-        if event.inaxes != self.ax or not self.marking_type_group.checkedButton():
+        if event.inaxes != self.ax:
+            return
+        if self.toolbar.mode == '':
+            # Right click deletes the nearest marker; shift+click selects one and the next click places it
+            if event.button == 3:
+                self.selected_marker = None
+                self.delete_nearest_marker(event.xdata)
+                return
+            if event.key == 'shift':
+                self.select_marker(event.xdata)
+                return
+            if self.selected_marker is not None and event.button == 1:
+                self.move_selected_marker(event.xdata)
+                return
+        if not self.marking_type_group.checkedButton():
             return
         if self.toolbar.mode != '':
             # If any toolbar tools are active, reset marking type
@@ -498,51 +1012,87 @@ class AnnotationApp(QMainWindow):
             self.marking_type_group.setExclusive(True)
             return
         time = event.xdata
-        label = ""
         if self.mark_timings.isChecked():
-            if self.line_positions['S1_start'] is None:
-                self.line_positions['S1_start'] = time
-                line = self.ax.axvline(time, color='red', label='S1 Start')
-                label = 'S1 Start'
-            elif self.line_positions['S1_end'] is None:
-                self.line_positions['S1_end'] = time
-                line = self.ax.axvline(time, color='blue', label='S1 End')
-                label = 'S1 End'
-            elif self.line_positions['S2_start'] is None:
-                self.line_positions['S2_start'] = time
-                line = self.ax.axvline(time, color='green', label='S2 Start')
-                label = 'S2 Start'
-            elif self.line_positions['S2_end'] is None:
-                self.line_positions['S2_end'] = time
-                line = self.ax.axvline(time, color='purple', label='S2 End')
-                label = 'S2 End'
+            for key in self.line_positions:
+                if self.line_positions[key] is None:
+                    self.edit_field(key, time)
+                    break
         elif self.mark_quality.isChecked():
-            if not self.quality_drop_positions or self.quality_drop_positions[-1][1] is not None:
-                self.quality_drop_positions.append([time, None])
-                line = self.ax.axvline(time, color='orange', linestyle='--', label='Quality Drop Start')
-                label = 'Quality Drop Start'
-            elif self.quality_drop_positions[-1][1] is None:
-                self.quality_drop_positions[-1][1] = time
-                line = self.ax.axvline(time, color='brown', linestyle='--', label='Quality Drop End')
-                label = 'Quality Drop End'
-        if label:
-            self.lines.append(line)
-            line_label = self.ax.text(time, self.ax.get_ylim()[1], label, color=line.get_color(), verticalalignment='bottom')
-            self.line_labels.append(line_label)
-        self.canvas.draw()
+            drops = self.field_value('quality_drop_positions')
+            if not drops or drops[-1][1] is not None:
+                drops.append([time, None])
+            else:
+                drops[-1][1] = time
+            self.edit_field('quality_drop_positions', drops)
+
+    def nearest_marker(self, time):
+        # (field, drop position or None) of the marker closest to time, if it is close enough to mean it
+        candidates = [(abs(value - time), key, None) for key, value in self.line_positions.items() if value is not None]
+        for index, pair in enumerate(self.quality_drop_positions):
+            for end, value in enumerate(pair):
+                if value is not None:
+                    candidates.append((abs(value - time), 'quality_drop_positions', (index, end)))
+        if not candidates:
+            return None
+        distance, field, position = min(candidates, key=lambda candidate: candidate[0])
+        xmin, xmax = self.ax.get_xlim()
+        if distance > MARKER_TOLERANCE * (xmax - xmin):
+            return None
+        return field, position
+
+    def select_marker(self, time):
+        self.selected_marker = self.nearest_marker(time)
+        if self.selected_marker is None:
+            self.statusBar().showMessage("No marker near the click to move")
+        else:
+            self.statusBar().showMessage("Marker selected: click anywhere on the plot to place it")
+
+    def move_selected_marker(self, time):
+        field, position = self.selected_marker
+        self.selected_marker = None
+        self.statusBar().clearMessage()
+        if position is None:
+            if self.line_positions[field] is not None:
+                self.edit_field(field, time)
+            return
+        drops = self.field_value('quality_drop_positions')
+        index, end = position
+        # An undo since the marker was selected may have removed it
+        if index < len(drops) and drops[index][end] is not None:
+            drops[index][end] = time
+            self.edit_field('quality_drop_positions', drops)
+
+    def delete_nearest_marker(self, time):
+        marker = self.nearest_marker(time)
+        if marker is None:
+            return
+        field, position = marker
+        if position is None:
+            self.edit_field(field, None)
+            return
+        drops = self.field_value('quality_drop_positions')
+        index, end = position
+        if end == 1:
+            drops[index][1] = None
+        else:
+            del drops[index]  # a drop without a start means nothing, so the pair goes
+        self.edit_field('quality_drop_positions', drops)
 
     def go_back(self):
-        if self.current_index > 0:
-            # Remove the last
-            self.annotations.pop()
-            self.load_previous_file()
-            self.reset_annotations()
-            self.update_view()
+        # The previous file's saved annotation is restored from the store, not thrown away
+        if self.current_file is None:
+            return
+        self.load_previous_file()
 
     def set_audio_file(self, file_path):
+        from PyQt5.QtMultimedia import QMediaContent
+        self.init_media_player()
         self.mediaPlayer.setMedia(QMediaContent(QUrl.fromLocalFile(os.path.abspath(file_path))))
 
     def toggle_play(self):
+        if self.mediaPlayer is None:
+            return
+        from PyQt5.QtMultimedia import QMediaPlayer
         if self.mediaPlayer.state() == QMediaPlayer.PlayingState:
             self.mediaPlayer.pause()
             self.playButton.setText('▶')
@@ -551,6 +1101,8 @@ class AnnotationApp(QMainWindow):
             self.playButton.setText('⏸')
 
     def set_position(self, position):
+        if self.mediaPlayer is None:
+            return
         self.mediaPlayer.setPosition(position)
 
     def update_duration(self, duration):
@@ -577,6 +1129,10 @@ class AnnotationApp(QMainWindow):
         self.timeLabel.setText(f"{minutes}:{seconds:02d} / {total_minutes}:{total_seconds:02d}")
 
     def update_audio_line(self, position):
+        # The timer fires every 5 ms; skip the redraw when playback hasn't moved
+        if position == self.last_audio_position:
+            return
+        self.last_audio_position = position
         # Clear any existing audio line
         for line in self.lines:
             if line.get_linestyle() == '-.':
@@ -585,36 +1141,30 @@ class AnnotationApp(QMainWindow):
 
         # Add new audio line
         time = position / 1000  # Convert position to seconds
+        if self.streaming_checkbox.isChecked() and self.stream_source is not None:
+            # Follow playback into the next window
+            index = int(time // STREAM_WINDOW_SECONDS)
+            if index != self.window_scroll.value() and index <= self.window_scroll.maximum():
+                self.window_scroll.setValue(index)
         audio_line = self.ax.axvline(time, color='magenta', linestyle='-.', label='Audio Position')
         self.lines.append(audio_line)
-        self.canvas.draw()
+        self.canvas.draw_idle()
 
 def annotate_spectrograms(folder_path, csv_path):
     app = QApplication(sys.argv)
     window = AnnotationApp()
-    
-    completed_files = window.get_completed_files(csv_path)
-    window.get_file_list(folder_path, completed_files)  
-    
-    if window.file_list:
-        last_index = window.get_last_index(csv_path)
-        if last_index != -1:
-            window.current_index = last_index
-            window.current_file = window.file_list[window.current_index]
-        
-        window.show()
-        window.load_next_file() 
-        app.exec_()
+    window.show()
 
-        df = pd.DataFrame(window.annotations)
-        
-        if os.path.exists(csv_path):
-            df_existing = pd.read_csv(csv_path)
-            df = pd.concat([df_existing, df], ignore_index=True) 
-        
-        df.to_csv(csv_path, index=False)
-    else:
-        print("All files have been annotated.")
+    # Discovery runs in the background; the first file is loaded when it reports back
+    completed_files = window.get_completed_files(csv_path)
+    manifest_path = os.path.join(os.path.dirname(csv_path), 'content_ids.csv')
+    window.start_file_discovery(folder_path, completed_files, manifest_path)
+    QTimer.singleShot(0, window.init_media_player)
+    app.exec_()
+
+    # Annotations are already on disk; each one is appended to csv_path as it is saved
+    if window.discovery_thread is not None:
+        window.discovery_thread.wait()
 
 if __name__ == '__main__':
     folder_path = r"C:\Users\prapa\Documents\GitHub\AuscultationApp\training_data"  # Change path
@@ -0,0 +1,84 @@
+import ast
+import csv
+import os
+import tempfile
+
+# Persistent store for annotations. Each saved annotation is appended to the CSV straight away,
+# so nothing is lost if the tool crashes, and an in-memory index keyed by content ID (filename
+# for rows saved before content IDs existed) gives O(1) lookups when a file is revisited.
+# Re-annotating a file appends a new row; the latest row for a recording wins.
+
+
+def annotation_key(annotation):
+    return annotation.get('content_id') or annotation['filename']
+
+
+def parse_marker(value):
+    # Rows read back from the CSV hold strings, rows saved this session hold floats or None
+    if value is None or value == '':
+        return None
+    value = float(value)
+    return None if value != value else value  # NaN means unset
+
+
+def parse_drops(value):
+    if isinstance(value, list):
+        return [list(pair) for pair in value]
+    if not value:
+        return []
+    try:
+        return [list(pair) for pair in ast.literal_eval(value)]
+    except (ValueError, SyntaxError):
+        return []
+
+
+class AnnotationStore:
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.fieldnames = []
+        self.rows = {}
+        if os.path.exists(csv_path):
+            with open(csv_path, newline='') as f:
+                reader = csv.DictReader(f)
+                self.fieldnames = list(reader.fieldnames or [])
+                for row in reader:
+                    self.rows[annotation_key(row)] = row
+
+    def __len__(self):
+        return len(self.rows)
+
+    def keys(self):
+        return list(self.rows)
+
+    def get(self, content_id, filename):
+        return self.rows.get(content_id) or self.rows.get(filename)
+
+    def put(self, annotation):
+        self.rows[annotation_key(annotation)] = annotation
+        new_fields = [field for field in annotation if field not in self.fieldnames]
+        if new_fields and self.fieldnames:
+            # Columns added since the file was written (e.g. content_id): widen the header once
+            self.rewrite(self.fieldnames + new_fields)
+        elif new_fields:
+            self.fieldnames = list(annotation)
+            with open(self.csv_path, 'w', newline='') as f:
+                csv.DictWriter(f, fieldnames=self.fieldnames).writeheader()
+        with open(self.csv_path, 'a', newline='') as f:
+            csv.DictWriter(f, fieldnames=self.fieldnames).writerow(annotation)
+
+    def rewrite(self, fieldnames):
+        with open(self.csv_path, newline='') as f:
+            existing = list(csv.DictReader(f))
+        # Written to a temporary file next to the CSV and swapped in, so a crash or a full disk
+        # halfway through leaves the original file untouched
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(os.path.abspath(self.csv_path)))
+        try:
+            with os.fdopen(fd, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(existing)
+            os.replace(tmp_path, self.csv_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.fieldnames = fieldnames
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+# Startup budget for importing the annotation tool, in seconds. Measured in a fresh
+# interpreter so nothing already cached in this process skews the number.
+IMPORT_BUDGET = 1.5
+APP_MODULE = "annotation_scripy_v3"
+# Modules that must only be imported on demand, never at startup
+DEFERRED_MODULES = ["pandas", "stockwell", "matplotlib.pyplot", "PyQt5.QtMultimedia"]
+
+MEASURE_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(name for name in {deferred!r} if name in sys.modules))
+"""
+
+
+def measure_import(runs=3):
+    # Best of a few runs to keep disk cache noise out of the result
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    snippet = MEASURE_SNIPPET.format(module=APP_MODULE, deferred=DEFERRED_MODULES)
+    best = None
+    loaded = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", snippet], cwd=app_dir,
+                             capture_output=True, text=True, check=True).stdout.splitlines()
+        elapsed = float(out[0])
+        loaded = [name for name in out[1].split(",") if name]
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, loaded
+
+
+def check_startup(budget=IMPORT_BUDGET):
+    elapsed, loaded = measure_import()
+    print(f"import {APP_MODULE}: {elapsed:.3f}s (budget {budget:.3f}s)")
+    ok = True
+    if elapsed > budget:
+        print("ERROR: startup import time is over budget!")
+        ok = False
+    if loaded:
+        print("ERROR: deferred modules imported at startup: " + ", ".join(loaded))
+        ok = False
+    return ok
+
+
+if __name__ == '__main__':
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else IMPORT_BUDGET
+    sys.exit(0 if check_startup(budget) else 1)
@@ -0,0 +1,135 @@
+import csv
+import hashlib
+import os
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Content IDs for the dataset. Every WAV gets the SHA-1 of its bytes as an ID, so the same
+# recording is recognised no matter how pruner.py or shuffle.py renamed it. The scan also checks
+# the RIFF header so corrupt or truncated files are caught before they reach the annotator.
+# hashlib releases the GIL on large reads, so a thread pool hashes on every core.
+
+HASH_CHUNK = 1 << 20
+MANIFEST_FIELDS = ['filename', 'content_id', 'size', 'mtime_ns', 'status', 'duplicate_of', 'error']
+
+
+def content_id(path):
+    # Streamed so long recordings never have to sit in memory just to be hashed
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def check_wav_header(path):
+    # Returns a description of the problem, or None if the header and data chunk look sound
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return 'not a RIFF/WAVE file'
+        has_fmt = False
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk)
+            if chunk_id == b'fmt ':
+                if chunk_size < 16:
+                    return 'fmt chunk too short'
+                has_fmt = True
+            elif chunk_id == b'data':
+                if not has_fmt:
+                    return 'data chunk before fmt chunk'
+                if chunk_size == 0:
+                    return 'empty data chunk'
+                if f.tell() + chunk_size > size:
+                    return f'truncated: data chunk declares {chunk_size} bytes, {size - f.tell()} present'
+                return None
+            f.seek(chunk_size + (chunk_size & 1), 1)
+    return 'missing data chunk' if has_fmt else 'missing fmt chunk'
+
+
+def wav_duration(path):
+    # Length in seconds from the fmt and data chunk headers, without reading any samples.
+    # Returns None if the header can't be parsed.
+    with open(path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return None
+        byte_rate = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk)
+            if chunk_id == b'fmt ' and chunk_size >= 16:
+                byte_rate = struct.unpack('<HHII', f.read(12))[3]
+                f.seek(chunk_size - 12 + (chunk_size & 1), 1)
+                continue
+            if chunk_id == b'data':
+                return chunk_size / byte_rate if byte_rate else None
+            f.seek(chunk_size + (chunk_size & 1), 1)
+
+
+def load_manifest(manifest_path):
+    if manifest_path and os.path.exists(manifest_path):
+        with open(manifest_path, newline='') as f:
+            return {row['filename']: row for row in csv.DictReader(f)}
+    return {}
+
+
+def save_manifest(records, manifest_path):
+    with open(manifest_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def scan_file(path, previous=None):
+    stat = os.stat(path)
+    # Unchanged files (same size and mtime) keep their ID from the last scan instead of being rehashed
+    if previous and previous['size'] == str(stat.st_size) and previous['mtime_ns'] == str(stat.st_mtime_ns):
+        cid = previous['content_id']
+    else:
+        cid = content_id(path)
+    error = check_wav_header(path)
+    return {'filename': path, 'content_id': cid, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'status': 'corrupt' if error else 'ok', 'duplicate_of': '', 'error': error or ''}
+
+
+def scan_dataset(folder_path, manifest_path=None, workers=None):
+    previous = load_manifest(manifest_path)
+    files = sorted(os.path.join(subdir, file) for subdir, _, names in os.walk(folder_path)
+                   for file in names if file.endswith('.wav'))
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        records = list(pool.map(lambda path: scan_file(path, previous.get(path)), files))
+
+    # The first file (in path order) holding a given content is the original, the rest are duplicates
+    first_seen = {}
+    for record in records:
+        if record['content_id'] in first_seen:
+            record['status'] = 'duplicate'
+            record['duplicate_of'] = first_seen[record['content_id']]
+        else:
+            first_seen[record['content_id']] = record['filename']
+
+    if manifest_path:
+        save_manifest(records, manifest_path)
+    return records
+
+
+if __name__ == '__main__':
+    folder_path = r"C:\Users\prapa\Documents\GitHub\AuscultationApp\training_data"  # Change path
+    manifest_path = r"C:\Users\prapa\Documents\GitHub\AuscultationApp\content_ids.csv"  # Change path
+    records = scan_dataset(folder_path, manifest_path)
+    for record in records:
+        if record['status'] == 'duplicate':
+            print(f"DUPLICATE: {record['filename']} is the same recording as {record['duplicate_of']}")
+        elif record['status'] == 'corrupt':
+            print(f"CORRUPT: {record['filename']}: {record['error']}")
+    summary = {status: sum(record['status'] == status for record in records) for status in ['ok', 'duplicate', 'corrupt']}
+    print(summary)
+    sys.exit(0 if summary['corrupt'] == 0 else 1)
@@ -0,0 +1,35 @@
+# Undo/redo for one file's annotation. Every edit is recorded as a command holding one or more
+# (field, old, new) changes, where field is a marker key ('S1_start', ...), 'quality_drop_positions'
+# or a form label ('quality', 'confidence', ...). Undo re-applies every old, redo every new, so a
+# compound edit such as Reset comes back in one step.
+
+
+class EditHistory:
+    def __init__(self):
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def record(self, field, old, new):
+        return self.record_many([(field, old, new)])
+
+    def record_many(self, changes):
+        changes = [(field, old, new) for field, old, new in changes if old != new]
+        if not changes:
+            return False
+        self.undo_stack.append(changes)
+        self.redo_stack.clear()
+        return True
+
+    def undo(self):
+        if not self.undo_stack:
+            return None
+        changes = self.undo_stack.pop()
+        self.redo_stack.append(changes)
+        return [(field, old) for field, old, _ in reversed(changes)]
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        changes = self.redo_stack.pop()
+        self.undo_stack.append(changes)
+        return [(field, new) for field, _, new in changes]
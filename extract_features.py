@@ -0,0 +1,262 @@
+import ast
+import csv
+import hashlib
+import os
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+import scipy.io.wavfile as wav
+from scipy import signal
+
+from content_ids import scan_dataset
+
+# Batch feature extraction for the murmur classifier. Every recording in the data folder is
+# decoded once, summarised into a fixed-length feature row and cached under a key built from
+# its content ID, so a rerun only touches new or changed recordings (or changed annotations).
+# The rows are then stacked into features.npy, which can be opened with np.load(mmap_mode='r'),
+# next to index.csv (which row belongs to which recording) and feature_names.txt.
+
+NFFT = 256
+HOP = 64
+N_MELS = 32
+ROLLOFF = 0.85
+MARKERS = ['S1_start', 'S1_end', 'S2_start', 'S2_end']
+
+
+def feature_names():
+    names = []
+    for i in range(N_MELS):
+        names += [f'logmel_{i}_mean', f'logmel_{i}_std']
+    for stat in ['centroid', 'bandwidth', 'rolloff', 'log_energy']:
+        names += [f'stft_{stat}_mean', f'stft_{stat}_std']
+    for stat in ['mean', 'std', 'max', 'p10', 'p90']:
+        names.append(f'envelope_{stat}')
+    names += ['s1_duration', 's2_duration', 'systole_duration', 'cycle_duration']
+    names += ['duration', 'quality_drop_fraction']
+    return names
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def load_annotations(csv_path):
+    # Keyed by content ID, falling back to basename for rows written before content IDs existed
+    # (the tool stores absolute paths from whichever machine did the annotating).
+    # Later rows win, matching how the annotator appends re-done files.
+    annotations = {}
+    if os.path.exists(csv_path):
+        with open(csv_path, newline='') as f:
+            for row in csv.DictReader(f):
+                annotations[row.get('content_id') or os.path.basename(row['filename'].replace('\\', '/'))] = row
+    return annotations
+
+
+def parse_annotation(row):
+    markers = {key: to_float(row.get(key)) if row else np.nan for key in MARKERS}
+    drops = []
+    if row and row.get('quality_drop_positions'):
+        try:
+            drops = ast.literal_eval(row['quality_drop_positions'])
+        except (ValueError, SyntaxError):
+            drops = []
+    return markers, [(to_float(start), to_float(end)) for start, end in drops]
+
+
+def cache_key(file_hash, row, per_cycle):
+    relevant = repr([row.get(key) for key in MARKERS + ['quality_drop_positions']] if row else None)
+    suffix = hashlib.sha1((relevant + str(per_cycle)).encode()).hexdigest()[:12]
+    return f'{file_hash}_{suffix}'
+
+
+def mel_filterbank(rate, n_fft, n_mels):
+    def hz_to_mel(f):
+        return 2595 * np.log10(1 + f / 700)
+
+    def mel_to_hz(m):
+        return 700 * (10 ** (m / 2595) - 1)
+
+    hz = mel_to_hz(np.linspace(hz_to_mel(0), hz_to_mel(rate / 2), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1 / rate)
+    fb = np.zeros((n_mels, len(bins)))
+    for i in range(n_mels):
+        lo, center, hi = hz[i:i + 3]
+        rising = (bins - lo) / (center - lo)
+        falling = (hi - bins) / (hi - center)
+        fb[i] = np.maximum(0, np.minimum(rising, falling))
+    return fb
+
+
+def drop_mask(times, drops):
+    mask = np.zeros(len(times), dtype=bool)
+    for start, end in drops:
+        if np.isnan(start):
+            continue
+        end = times[-1] if np.isnan(end) else end
+        mask |= (times >= start) & (times <= end)
+    return mask
+
+
+def mean_std(values, keep):
+    values = values[..., keep]
+    return np.mean(values, axis=-1), np.std(values, axis=-1)
+
+
+def recording_features(data, rate, markers, drops, window=None):
+    duration = len(data) / rate
+    freqs, frame_times, Z = signal.stft(data, fs=rate, nperseg=NFFT, noverlap=NFFT - HOP)
+    power = np.abs(Z) ** 2
+    eps = np.finfo(float).eps
+
+    frame_drop = drop_mask(frame_times, drops)
+    sample_times = np.arange(len(data)) / rate
+    sample_drop = drop_mask(sample_times, drops)
+    if window is not None:
+        frame_in = (frame_times >= window[0]) & (frame_times <= window[1])
+        sample_in = (sample_times >= window[0]) & (sample_times <= window[1])
+    else:
+        frame_in = np.ones(len(frame_times), dtype=bool)
+        sample_in = np.ones(len(sample_times), dtype=bool)
+    # Summaries skip quality drops unless the drop covers everything
+    frame_keep = frame_in & ~frame_drop if (frame_in & ~frame_drop).any() else frame_in
+    sample_keep = sample_in & ~sample_drop if (sample_in & ~sample_drop).any() else sample_in
+
+    row = []
+    log_mel = np.log10(mel_filterbank(rate, NFFT, N_MELS) @ power + eps)
+    mel_mean, mel_std = mean_std(log_mel, frame_keep)
+    row += list(np.column_stack([mel_mean, mel_std]).ravel())
+
+    total = power.sum(axis=0) + eps
+    centroid = (freqs[:, None] * power).sum(axis=0) / total
+    bandwidth = np.sqrt((((freqs[:, None] - centroid) ** 2) * power).sum(axis=0) / total)
+    rolloff = freqs[np.argmax(np.cumsum(power, axis=0) >= ROLLOFF * total, axis=0)]
+    for values in [centroid, bandwidth, rolloff, np.log10(total)]:
+        row += list(mean_std(values, frame_keep))
+
+    envelope = np.abs(signal.hilbert(data))[sample_keep]
+    envelope = envelope / (envelope.max() + eps)
+    row += [envelope.mean(), envelope.std(), envelope.max(),
+            np.percentile(envelope, 10), np.percentile(envelope, 90)]
+
+    row += [markers['S1_end'] - markers['S1_start'],
+            markers['S2_end'] - markers['S2_start'],
+            markers['S2_start'] - markers['S1_end'],
+            markers['S2_end'] - markers['S1_start']]
+    row += [duration if window is None else window[1] - window[0], frame_drop[frame_in].mean()]
+    return np.asarray(row, dtype=np.float32), frame_drop
+
+
+def extract_recording(job):
+    # Returns (path, error); one bad recording is reported instead of aborting the batch
+    path = job[0]
+    try:
+        write_recording_features(*job)
+    except Exception as err:
+        return path, f'{type(err).__name__}: {err}'
+    return path, None
+
+
+def write_recording_features(path, key, row, per_cycle, cache_dir):
+    rate, data = wav.read(path)
+    # Scale to [-1, 1] before mixing down, while the integer dtype is still known
+    if np.issubdtype(data.dtype, np.integer):
+        data = data / np.iinfo(data.dtype).max
+    data = data.astype(np.float64)
+    if data.ndim > 1:
+        data = np.mean(data, axis=1)
+    markers, drops = parse_annotation(row)
+
+    if per_cycle:
+        # Only the annotated S1 start to S2 end cycle; recordings without full markers give no rows
+        if any(np.isnan(markers[marker]) for marker in MARKERS):
+            features = np.empty((0, len(feature_names())), dtype=np.float32)
+            mask = np.empty(0, dtype=bool)
+        else:
+            features, mask = recording_features(data, rate, markers, drops,
+                                                window=(markers['S1_start'], markers['S2_end']))
+            features = features[None, :]
+    else:
+        features, mask = recording_features(data, rate, markers, drops)
+        features = features[None, :]
+    # Written under a temporary name and moved into place, so a killed worker never leaves a
+    # partial archive that later runs would mistake for a finished one
+    tmp_path = os.path.join(cache_dir, key + '.tmp.npz')
+    np.savez(tmp_path, features=features, quality_mask=mask)
+    os.replace(tmp_path, os.path.join(cache_dir, key + '.npz'))
+
+
+def extract_features(folder_path, csv_path, out_dir, per_cycle=False, processes=None, manifest_path=None):
+    # One cache per mode: the purge below only sees the current mode's entries, so switching
+    # between per-recording and per-cycle runs doesn't throw away the other mode's work
+    cache_dir = os.path.join(out_dir, 'cache_cycle' if per_cycle else 'cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    annotations = load_annotations(csv_path)
+
+    # Duplicates would weight a recording twice and corrupt files can't be decoded, so only originals go in
+    records = [record for record in scan_dataset(folder_path, manifest_path) if record['status'] == 'ok']
+    files = [record['filename'] for record in records]
+    with Pool(processes) as pool:
+        entries = []
+        jobs = []
+        for path, file_hash in zip(files, [record['content_id'] for record in records]):
+            row = annotations.get(file_hash) or annotations.get(os.path.basename(path))
+            key = cache_key(file_hash, row, per_cycle)
+            entries.append((path, file_hash, key))
+            if not os.path.exists(os.path.join(cache_dir, key + '.npz')):
+                jobs.append((path, key, row, per_cycle, cache_dir))
+        print(f"{len(jobs)} of {len(files)} recordings need feature extraction")
+        failed = set()
+        for i, (path, error) in enumerate(pool.imap_unordered(extract_recording, jobs), 1):
+            if error:
+                failed.add(path)
+                print(f"[{i}/{len(jobs)}] ERROR: {os.path.basename(path)}: {error}")
+            else:
+                print(f"[{i}/{len(jobs)}] {os.path.basename(path)}")
+    if failed:
+        print(f"{len(failed)} recordings failed and are left out of the output")
+        entries = [entry for entry in entries if entry[0] not in failed]
+
+    # Stack cached rows straight into a memory-mapped array so the output never sits in RAM whole
+    counts = []
+    for path, file_hash, key in entries:
+        with np.load(os.path.join(cache_dir, key + '.npz')) as cached:
+            counts.append(cached['features'].shape[0])
+    names = feature_names()
+    features = np.lib.format.open_memmap(os.path.join(out_dir, 'features.npy'), mode='w+',
+                                         dtype=np.float32, shape=(sum(counts), len(names)))
+    masks = {}
+    with open(os.path.join(out_dir, 'index.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['row', 'filename', 'content_id', 'cache_key', 'level'])
+        start = 0
+        for (path, file_hash, key), count in zip(entries, counts):
+            with np.load(os.path.join(cache_dir, key + '.npz')) as cached:
+                features[start:start + count] = cached['features']
+                masks[key] = cached['quality_mask']
+            for i in range(count):
+                writer.writerow([start + i, path, file_hash, key, 'cycle' if per_cycle else 'recording'])
+            start += count
+    features.flush()
+    np.savez_compressed(os.path.join(out_dir, 'quality_masks.npz'), **masks)
+    with open(os.path.join(out_dir, 'feature_names.txt'), 'w') as f:
+        f.write('\n'.join(names) + '\n')
+
+    # Cache entries no longer referenced belong to recordings that changed or were removed
+    live = {key + '.npz' for _, _, key in entries}
+    for name in os.listdir(cache_dir):
+        if name not in live:
+            os.remove(os.path.join(cache_dir, name))
+    return features.shape
+
+
+if __name__ == '__main__':
+    folder_path = r"C:\Users\prapa\Documents\GitHub\AuscultationApp\training_data"  # Change path
+    csv_path = r"C:\Users\prapa\Documents\GitHub\AuscultationApp\data.csv"  # Change path
+    out_dir = r"C:\Users\prapa\Documents\GitHub\AuscultationApp\features"  # Change path
+    manifest_path = r"C:\Users\prapa\Documents\GitHub\AuscultationApp\content_ids.csv"  # Change path
+    per_cycle = '--per-cycle' in sys.argv
+    print(extract_features(folder_path, csv_path, out_dir, per_cycle=per_cycle, manifest_path=manifest_path))